@@ -4,227 +4,490 @@ Instagram Export Date Fixer
 Extracts date taken from Instagram export HTML and updates image metadata
 """
 
+import argparse
+import html
+import logging
+import logging.handlers
+import mmap
+import multiprocessing
 import os
 import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
-from bs4 import BeautifulSoup
-from PIL import Image
+from lxml import etree
+from PIL import Image, UnidentifiedImageError
 import piexif
 import shutil
+import struct
 
+# Per-image and per-file progress goes through this logger so that output
+# from worker processes is funnelled through a single buffered writer
+logger = logging.getLogger('instagram_date_fixer')
+
+# Class attribute of the container div wrapping each post
+POST_CLASS = 'pam _3-95 _2ph- _a6-g uiBoxWhite noborder'
+
+# Precompiled per-post lookups, evaluated by libxml2 in a single call each
+DATE_XPATH = etree.XPath("string(.//div[@class='_3-94 _a6-o'])")
+IMAGE_SRC_XPATH = etree.XPath("string(.//img[@class='_a6_o _3-96']/@src)")
+TABLE_DATE_XPATH = etree.XPath(
+    "string(.//tr[td[1]//div[contains(concat(' ', @class, ' '), ' _a6-q ')]"
+    "[normalize-space() = 'Date taken']]"
+    "/td[2]//div[contains(concat(' ', @class, ' '), ' _a6-q ')])"
+)
+
+# Byte-level patterns for the fast path, which scans the raw document
+# without building a tree. They rely on Instagram's stable export markup
+POST_START_RE = re.compile(rb'<div class="' + re.escape(POST_CLASS).encode() + rb'"[\s>]')
+DATE_DIV_RE = re.compile(rb'<div class="_3-94 _a6-o">([^<]*)</div>')
+# Attribute and class names are anchored with (?<![\w-]) rather than \b, so
+# that e.g. data-src or data-class cannot stand in for src or class
+IMAGE_TAG_RE = re.compile(rb'<img\b[^>]*(?<![\w-])class="_a6_o _3-96"[^>]*>')
+SRC_ATTR_RE = re.compile(rb'(?<![\w-])src="([^"]*)"')
+VIDEO_TAG_RE = re.compile(rb'<video\b')
+TABLE_DATE_RE = re.compile(
+    rb'<div class="[^"]*(?<![\w-])_a6-q(?![\w-])[^"]*">\s*Date taken\s*</div>.*?</td>'
+    rb'.*?<div class="[^"]*(?<![\w-])_a6-q(?![\w-])[^"]*">([^<]*)</div>',
+    re.DOTALL
+)
+
+# Date formats found in Instagram exports
+EXIF_DATE_FORMAT = "%Y:%m:%d %H:%M:%S"
+DISPLAY_DATE_FORMAT = "%b %d, %Y %I:%M %p"
+
+# Number of HTML files paged in ahead in the background while one is processed
+HTML_PREFETCH_DEPTH = 2
+
+# Start-of-image marker of JPEG data, whose EXIF block can be patched in
+# place without re-encoding
+JPEG_SOI = b'\xff\xd8'
+
+# Precompiled matcher and month table for the exact shapes Instagram emits,
+# which are much cheaper than strptime
+EXIF_DATE_RE = re.compile(r'^(\d{4}):(\d{2}):(\d{2}) (\d{2}):(\d{2}):(\d{2})$')
+MONTHS = {
+    'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+    'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12,
+}
+
+def _parse_display_date(date_str):
+    """Parse the display format (Aug 06, 2012 4:13 pm) by splitting tokens"""
+    tokens = date_str.split()
+    if len(tokens) != 5:
+        return None
+    month_name, day, year, clock, meridiem = tokens
+    month = MONTHS.get(month_name)
+    meridiem = meridiem.lower()
+    if month is None or not day.endswith(',') or meridiem not in ('am', 'pm'):
+        return None
+    
+    hour, minute = clock.split(':')
+    hour = int(hour)
+    if not 1 <= hour <= 12:
+        return None
+    hour = hour % 12 + (12 if meridiem == 'pm' else 0)
+    return datetime(int(year), month, int(day[:-1]), hour, int(minute))
+
+@lru_cache(maxsize=4096)
 def parse_instagram_date(date_str):
     """Parse Instagram date formats"""
-    # Try EXIF format: 2024:09:24 15:42:54
+    # Cached because carousel and burst posts repeat the same timestamp
     try:
-        return datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
+        # Fast path: EXIF format
+        match = EXIF_DATE_RE.match(date_str)
+        if match:
+            return datetime(*map(int, match.groups()))
+        
+        # Fast path: display format
+        date = _parse_display_date(date_str)
+        if date:
+            return date
     except ValueError:
         pass
     
-    # Try display format: Aug 06, 2012 4:13 pm
+    # Fall back to strptime for anything the fast paths don't recognise.
+    # Pick the format from the first character rather than trying each in turn
+    first = date_str[:1]
     try:
-        return datetime.strptime(date_str, "%b %d, %Y %I:%M %p")
+        # EXIF format: 2024:09:24 15:42:54
+        if first.isdigit():
+            return datetime.strptime(date_str, EXIF_DATE_FORMAT)
+        # Display format: Aug 06, 2012 4:13 pm
+        if first.isalpha():
+            return datetime.strptime(date_str, DISPLAY_DATE_FORMAT)
     except ValueError:
         pass
     
     return None
 
-def find_date_in_html(html_content, debug=False):
-    """Extract date from Instagram HTML"""
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # First try to find the display date in div class="_3-94 _a6-o"
-    date_div = soup.find('div', class_='_3-94 _a6-o')
-    if date_div:
-        date_text = date_div.get_text(strip=True)
-        if debug:
-            print(f"  Debug: Found display date div: '{date_text}'")
-        date = parse_instagram_date(date_text)
-        if date:
-            if debug:
-                print(f"  Debug: Parsed display date = {date}")
-            return date
-    
-    # Fallback: try to find "Date taken" in metadata table
-    rows = soup.find_all('tr')
+def _list_directory(directory):
+    """Return the set of entry names in a directory (empty if missing)"""
+    try:
+        with os.scandir(directory) as entries:
+            return {entry.name for entry in entries}
+    except OSError:
+        return set()
+
+def _decode_text(raw):
+    """Decode a byte slice of HTML text into a stripped string"""
+    return html.unescape(raw.decode('utf-8', 'replace')).strip()
+
+def _scan_posts(html_content):
+    """Yield (image src, date) for each post using byte-level regexes"""
+    starts = [match.start() for match in POST_START_RE.finditer(html_content)]
+    ends = starts[1:] + [len(html_content)]
     
-    if debug:
-        print(f"  Debug: Found {len(rows)} table rows")
+    for start, end in zip(starts, ends):
+        post = html_content[start:end]
+        
+        # Find date in this post, falling back to the metadata table
+        date = None
+        match = DATE_DIV_RE.search(post)
+        if match:
+            date = parse_instagram_date(_decode_text(match.group(1)))
+        if not date:
+            match = TABLE_DATE_RE.search(post)
+            if match:
+                date = parse_instagram_date(_decode_text(match.group(1)))
+        
+        # Find image in this post
+        img_path = ''
+        match = IMAGE_TAG_RE.search(post)
+        if match:
+            match = SRC_ATTR_RE.search(match.group(0))
+            if match:
+                img_path = _decode_text(match.group(1))
+        
+        # Video posts have no image to extract, so they are not a sign of
+        # drifted markup
+        has_video = not img_path and VIDEO_TAG_RE.search(post)
+        if not date or not (img_path or has_video):
+            # Markup inside this post has drifted from the patterns above, so
+            # let the full HTML parser have a look at just this post
+            reparsed = list(_parse_posts(BytesIO(post)))
+            if reparsed:
+                yield from reparsed
+                continue
+        
+        yield img_path, date
+
+def _parse_posts(source):
+    """Yield (image src, date) for each post by streaming it through lxml"""
+    # Stream the document so finished posts can be freed as we go and the
+    # whole tree is never held in memory
+    events = etree.iterparse(
+        source, events=('end',), tag='div',
+        html=True, encoding='utf-8'
+    )
     
-    for row in rows:
-        cells = row.find_all('td')
-        if len(cells) >= 2:
-            # The label is in the first cell, value in the second
-            label_div = cells[0].find('div', class_='_a6-q')
-            # Value is nested: td -> div -> div (with class _a6-q)
-            value_container = cells[1].find('div')
-            if value_container:
-                value_div = value_container.find('div', class_='_a6-q')
-            else:
-                value_div = None
-            
-            if label_div:
-                label = label_div.get_text(strip=True)
-                
-                if debug:
-                    value_text = value_div.get_text(strip=True) if value_div else "NO VALUE"
-                    print(f"  Debug: Label='{label}', Value='{value_text}'")
-                
-                # Look for "Date taken" field
-                if label == "Date taken" and value_div:
-                    value = value_div.get_text(strip=True)
-                    if value:
-                        date = parse_instagram_date(value)
-                        if debug:
-                            print(f"  Debug: Parsed date from table = {date}")
-                        return date
+    for _, post in events:
+        if post.get('class') != POST_CLASS:
+            continue
+        
+        # Find date in this post, falling back to the metadata table
+        date = parse_instagram_date(DATE_XPATH(post).strip())
+        if not date:
+            date = parse_instagram_date(TABLE_DATE_XPATH(post).strip())
+        
+        # Find image in this post
+        img_path = IMAGE_SRC_XPATH(post)
+        
+        # Drop the processed post and anything before it
+        post.clear()
+        while post.getprevious() is not None:
+            del post.getparent()[0]
+        
+        yield img_path, date
+
+def _read_posts(html_file_path):
+    """Return (image src, date) for each post in an HTML file"""
+    with open(html_file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        # Map the file instead of reading it so the OS pages it in on demand
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as html_content:
+            # Fast path for the standard export markup
+            if POST_START_RE.search(html_content):
+                return list(_scan_posts(html_content))
     
-    return None
+    # Unfamiliar markup: fall back to the full HTML parser
+    return list(_parse_posts(str(html_file_path)))
 
-def find_images_in_html(html_content, html_file_path, debug=False):
-    """Extract all image paths and their dates from HTML"""
-    soup = BeautifulSoup(html_content, 'html.parser')
+def find_images_in_html(html_file_path, file_index, debug=False):
+    """Extract all image paths and their dates from an HTML file"""
+    # Find root by going up from your_instagram_activity
+    path_parts = Path(html_file_path).parts
+    try:
+        activity_idx = path_parts.index('your_instagram_activity')
+    except ValueError:
+        if debug:
+            logger.warning("  Warning: Could not determine root path")
+        return []
+    # Plain strings from here on: Path objects are costly to build per image
+    root_path = os.path.join(*path_parts[:activity_idx]) if activity_idx else ''
     
-    # Find all post containers
-    posts = soup.find_all('div', class_='pam _3-95 _2ph- _a6-g uiBoxWhite noborder')
+    candidates = []
+    for img_path, date in _read_posts(html_file_path):
+        if img_path and date:
+            candidates.append((os.path.join(root_path, os.path.normpath(img_path)), date))
     
+    # Check existence against the directory index rather than a stat call
+    # per image. The index is shared across HTML files, so each media
+    # directory is listed only once per run
     images_with_dates = []
-    
-    for post in posts:
-        # Find date in this post
-        date_div = post.find('div', class_='_3-94 _a6-o')
-        date = None
-        if date_div:
-            date_text = date_div.get_text(strip=True)
-            date = parse_instagram_date(date_text)
-        
-        # If no display date, try metadata table
-        if not date:
-            rows = post.find_all('tr')
-            for row in rows:
-                cells = row.find_all('td')
-                if len(cells) >= 2:
-                    label_div = cells[0].find('div', class_='_a6-q')
-                    value_container = cells[1].find('div')
-                    if value_container:
-                        value_div = value_container.find('div', class_='_a6-q')
-                    else:
-                        value_div = None
-                    
-                    if label_div and value_div:
-                        label = label_div.get_text(strip=True)
-                        if label == "Date taken":
-                            value = value_div.get_text(strip=True)
-                            if value:
-                                date = parse_instagram_date(value)
-                                break
+    for full_path, date in candidates:
+        directory, name = os.path.split(full_path)
+        if directory not in file_index:
+            file_index[directory] = _list_directory(directory or os.curdir)
         
-        # Find image in this post
-        img_tag = post.find('img', class_='_a6_o _3-96')
-        if img_tag and img_tag.get('src') and date:
-            img_path = img_tag['src']
-            
-            # Find root by going up from your_instagram_activity
-            path_parts = Path(html_file_path).parts
-            try:
-                activity_idx = path_parts.index('your_instagram_activity')
-                root_path = Path(*path_parts[:activity_idx])
-                full_path = root_path / img_path
-                
-                if full_path.exists():
-                    images_with_dates.append((str(full_path), date))
-                elif debug:
-                    print(f"  Warning: Image not found: {full_path}")
-            except (ValueError, IndexError):
-                if debug:
-                    print(f"  Warning: Could not determine root path")
+        if name in file_index[directory]:
+            images_with_dates.append((full_path, date))
+        elif debug:
+            logger.warning(f"  Warning: Image not found: {full_path}")
     
     return images_with_dates
 
+def _drop_page_cache(fd):
+    """Tell the kernel a finished file's cached pages are no longer needed"""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    except OSError:
+        pass
+
+def _read_original_date(f):
+    """Return DateTimeOriginal from an open image, reading only its metadata"""
+    try:
+        if f.read(2) == JPEG_SOI:
+            # Walk the JPEG segments up to the image data looking for EXIF
+            while True:
+                marker, length = struct.unpack('>2sH', f.read(4))
+                if marker[0] != 0xFF or marker[1] in (0xD9, 0xDA):
+                    return None
+                segment = f.read(length - 2)
+                if marker[1] == 0xE1 and segment.startswith(b'Exif\x00\x00'):
+                    exif_dict = piexif.load(segment)
+                    break
+        else:
+            # Pillow only reads the header and metadata chunks on open
+            f.seek(0)
+            with Image.open(f) as img:
+                exif = img.info.get('exif')
+            if not exif:
+                return None
+            exif_dict = piexif.load(exif)
+    except Exception:
+        return None
+    
+    return exif_dict["Exif"].get(piexif.ExifIFD.DateTimeOriginal)
+
+@lru_cache(maxsize=4096)
+def _date_only_exif(exif_date):
+    """Return serialized EXIF holding only the date fields"""
+    # Cached per worker process because carousel images share a date
+    return piexif.dump({
+        "0th": {piexif.ImageIFD.DateTime: exif_date},
+        "Exif": {
+            piexif.ExifIFD.DateTimeOriginal: exif_date,
+            piexif.ExifIFD.DateTimeDigitized: exif_date,
+        },
+        "GPS": {},
+        "1st": {},
+    })
+
 def update_image_metadata(image_path, date_taken):
     """Update image EXIF data and file timestamps"""
     if not os.path.exists(image_path):
-        print(f"  Error: Image not found: {image_path}")
+        logger.error(f"  Error: Image not found: {image_path}")
         return False
     
+    temp_path = f"{image_path}.tmp"
+    
     try:
-        # Create a backup
-        backup_path = f"{image_path}.backup"
-        shutil.copy2(image_path, backup_path)
+        # Format date for EXIF (YYYY:MM:DD HH:MM:SS)
+        exif_date = date_taken.strftime(EXIF_DATE_FORMAT)
+        timestamp = date_taken.timestamp()
+        
+        with open(image_path, 'rb') as f:
+            # Skip the rewrite when a previous run already set this date,
+            # which only needs the metadata at the head of the file
+            up_to_date = _read_original_date(f) == exif_date.encode()
+            
+            # Otherwise read the file once and share the bytes between EXIF
+            # load and write
+            if not up_to_date:
+                f.seek(0)
+                image_data = f.read()
+            
+            # The original's pages are clean and no longer needed, so they can
+            # leave the page cache straight away
+            _drop_page_cache(f.fileno())
         
-        # Open image
-        img = Image.open(image_path)
+        if up_to_date:
+            os.utime(image_path, (timestamp, timestamp))
+            logger.info(f"  ✓ Already up to date: {os.path.basename(image_path)} -> {date_taken}")
+            return True
         
-        # Format date for EXIF (YYYY:MM:DD HH:MM:SS)
-        exif_date = date_taken.strftime("%Y:%m:%d %H:%M:%S")
+        # Go by the file's contents rather than its extension, since exports
+        # can contain other formats saved under a .jpg name
+        is_jpeg = image_data[:2] == JPEG_SOI
         
         # Load existing EXIF data or create new
         try:
-            exif_dict = piexif.load(image_path)
+            exif_dict = piexif.load(image_data)
         except:
             exif_dict = {"0th": {}, "Exif": {}, "GPS": {}, "1st": {}}
         
-        # Update EXIF fields
-        exif_dict["0th"][piexif.ImageIFD.DateTime] = exif_date
-        exif_dict["Exif"][piexif.ExifIFD.DateTimeOriginal] = exif_date
-        exif_dict["Exif"][piexif.ExifIFD.DateTimeDigitized] = exif_date
-        
-        # Convert to bytes
-        exif_bytes = piexif.dump(exif_dict)
+        if any(exif_dict.values()):
+            # Update EXIF fields, keeping the tags already present
+            exif_dict["0th"][piexif.ImageIFD.DateTime] = exif_date
+            exif_dict["Exif"][piexif.ExifIFD.DateTimeOriginal] = exif_date
+            exif_dict["Exif"][piexif.ExifIFD.DateTimeDigitized] = exif_date
+            
+            # Convert to bytes
+            exif_bytes = piexif.dump(exif_dict)
+        else:
+            # Nothing else to preserve, so images sharing a date can share
+            # the same serialized EXIF block
+            exif_bytes = _date_only_exif(exif_date)
         
-        # Save image with updated EXIF
-        img.save(image_path, exif=exif_bytes, quality=95)
+        # Write the updated image to a temporary file and atomically swap it
+        # in, so the original is never left half-written
+        with open(temp_path, 'wb') as f:
+            if is_jpeg:
+                # Rewrite only the EXIF segment, leaving the image data untouched
+                patched = BytesIO()
+                piexif.insert(exif_bytes, image_data, patched)
+                f.write(patched.getvalue())
+            else:
+                # Other formats must be re-encoded
+                try:
+                    img = Image.open(BytesIO(image_data))
+                except UnidentifiedImageError:
+                    raise ValueError("not a recognised image format")
+                with img:
+                    img.save(f, format=img.format, exif=exif_bytes, quality=95)
+            
+            # Make sure the new contents are on disk before the rename, or a
+            # crash could leave an empty file in place of the original
+            f.flush()
+            os.fsync(f.fileno())
+            
+            # Each image is touched once, so keep it from crowding the page
+            # cache. After the fsync the pages are clean and can be dropped
+            _drop_page_cache(f.fileno())
+        shutil.copymode(image_path, temp_path)
+        os.replace(temp_path, image_path)
         
         # Update file system timestamps
-        timestamp = date_taken.timestamp()
         os.utime(image_path, (timestamp, timestamp))
         
-        # Remove backup after successful update
-        os.remove(backup_path)
-        
-        print(f"  ✓ Updated: {os.path.basename(image_path)} -> {date_taken}")
+        logger.info(f"  ✓ Updated: {os.path.basename(image_path)} -> {date_taken}")
         return True
         
     except Exception as e:
-        print(f"  Error updating {image_path}: {e}")
-        # Restore from backup if it exists
-        if os.path.exists(backup_path):
-            shutil.move(backup_path, image_path)
+        logger.error(f"  Error updating {image_path}: {e}")
+        # Discard a partially written temporary file
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
         return False
 
-def process_html_file(html_file_path, export_root, debug=False):
-    """Process a single HTML file"""
-    print(f"\nProcessing: {html_file_path}")
+def _update_one(image_with_date):
+    """Update a single (image_path, date_taken) pair in a worker process"""
+    image_path, date_taken = image_with_date
+    return update_image_metadata(image_path, date_taken)
+
+class _BufferedStreamHandler(logging.StreamHandler):
+    """StreamHandler that leaves flushing to the caller instead of every record"""
     
+    def emit(self, record):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+def _configure_logging(log_queue):
+    """Send this process's log records to the queue drained by main"""
+    logger.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+def _warm_html_file(html_file_path):
+    """Pull an HTML file into the page cache without keeping its contents"""
     try:
-        with open(html_file_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+        with open(html_file_path, 'rb') as f:
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+            else:
+                # No readahead hint available, so read and discard instead
+                while f.read(1024 * 1024):
+                    pass
+    except OSError:
+        # Unreadable files are reported when they are processed
+        pass
+
+def _prefetch_html_files(html_files):
+    """Yield HTML file paths while upcoming files are warmed in the background"""
+    with ThreadPoolExecutor(max_workers=2) as reader:
+        pending = deque()
+        for html_file in html_files:
+            pending.append((html_file, reader.submit(_warm_html_file, html_file)))
+            if len(pending) > HTML_PREFETCH_DEPTH:
+                html_file, future = pending.popleft()
+                future.result()
+                yield html_file
         
+        while pending:
+            html_file, future = pending.popleft()
+            future.result()
+            yield html_file
+
+def process_html_file(html_file_path, export_root, executor, file_index, debug=False):
+    """Process a single HTML file"""
+    logger.info(f"\nProcessing: {html_file_path}")
+    
+    try:
         # Extract all images and their dates
-        images_with_dates = find_images_in_html(html_content, html_file_path, debug=debug)
+        images_with_dates = find_images_in_html(html_file_path, file_index, debug=debug)
         
         if not images_with_dates:
-            print("  Warning: No images with dates found in HTML")
+            logger.warning("  Warning: No images with dates found in HTML")
             return 0
         
-        print(f"  Found {len(images_with_dates)} image(s)")
+        logger.info(f"  Found {len(images_with_dates)} image(s)")
+        
+        # Images referenced more than once must not be written concurrently,
+        # so keep only the last date seen for each path
+        unique_images = dict(images_with_dates).items()
         
-        # Update each image
-        success_count = 0
-        for image_path, date_taken in images_with_dates:
-            if update_image_metadata(image_path, date_taken):
-                success_count += 1
+        # Update images in parallel across the worker pool
+        results = executor.map(_update_one, unique_images, chunksize=8)
+        success_count = sum(1 for updated in results if updated)
         
         return success_count
         
     except Exception as e:
-        print(f"  Error processing file: {e}")
+        logger.error(f"  Error processing file: {e}")
         return 0
 
+def _positive_int(value):
+    """argparse type for options that need a count of at least one"""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got '{value}'")
+    return number
+
 def main():
     """Main function"""
-    import argparse
-    
     parser = argparse.ArgumentParser(
         description='Fix image dates from Instagram export HTML files'
     )
@@ -242,6 +505,12 @@ def main():
         action='store_true',
         help='Show detailed parsing information'
     )
+    parser.add_argument(
+        '--workers', '-w',
+        type=_positive_int,
+        default=None,
+        help='Number of worker processes used to update images (default: CPU count)'
+    )
     
     args = parser.parse_args()
     
@@ -277,13 +546,35 @@ def main():
     
     print(f"Found {len(html_files)} HTML file(s)")
     
+    # Records from this process and the workers are written by one
+    # listener thread, flushed once per HTML file rather than per line
+    log_queue = multiprocessing.Queue()
+    output = _BufferedStreamHandler(sys.stdout)
+    listener = logging.handlers.QueueListener(log_queue, output)
+    _configure_logging(log_queue)
+    listener.start()
+    
     # Process files
     success_count = 0
     total_images = 0
-    for html_file in html_files:
-        count = process_html_file(html_file, export_root, debug=args.debug)
-        success_count += count
-        total_images += count
+    file_index = {}
+    try:
+        with ProcessPoolExecutor(
+            max_workers=args.workers,
+            initializer=_configure_logging,
+            initargs=(log_queue,)
+        ) as executor:
+            # Paging in the next files overlaps with processing the current one
+            for html_file in _prefetch_html_files(html_files):
+                count = process_html_file(
+                    html_file, export_root, executor, file_index, debug=args.debug
+                )
+                success_count += count
+                total_images += count
+                output.flush()
+    finally:
+        listener.stop()
+        output.flush()
     
     print(f"\n{'='*50}")
     print(f"Completed: {success_count} images updated successfully from {len(html_files)} HTML file(s)")
@@ -0,0 +1,120 @@
+"""
+Tests for the regex fast path, checked against the lxml parser it stands in for
+"""
+
+import os
+import sys
+from datetime import datetime
+from io import BytesIO
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import instagram_date_fixer as fixer
+
+POST_OPEN = '<div class="pam _3-95 _2ph- _a6-g uiBoxWhite noborder">'
+
+def make_document(*posts):
+    """Wrap post markup in the page skeleton Instagram exports use"""
+    body = ''.join(POST_OPEN + post + '</div>' for post in posts)
+    return (
+        '<html><head><meta charset="utf-8" /><title>Posts</title></head>'
+        '<body><div class="_a705"><main class="_a706">' + body + '</main></div>'
+        '</body></html>'
+    ).encode('utf-8')
+
+DISPLAY_DATE_POST = (
+    '<h2 class="_3-95 _2pim _a6-h _a6-i">Caption</h2>'
+    '<div class="_3-95 _a6-p"><div><div><a target="_blank" href="media/posts/a.jpg">'
+    '<img src="media/posts/a.jpg" class="_a6_o _3-96" /></a></div></div></div>'
+    '<div class="_3-94 _a6-o">Aug 06, 2012 4:13 pm</div>'
+)
+
+TABLE_DATE_POST = (
+    '<div class="_3-95 _a6-p"><div><div>'
+    '<img src="media/posts/b.jpg" class="_a6_o _3-96" /></div>'
+    '<table><tr><td class="_2pin _a6_q">Camera<div><div class="_a6-q">Date taken</div></div></td>'
+    '<td class="_2pin _2piu _a6_r"><div><div class="_a6-q">2024:09:24 15:42:54</div></div></td>'
+    '</tr></table></div></div>'
+)
+
+ESCAPED_SRC_POST = (
+    '<img class="_a6_o _3-96" src="media/posts/tom&amp;jerry&#39;s.jpg" />'
+    '<div class="_3-94 _a6-o">Jan 02, 2015 1:00 am</div>'
+)
+
+DRIFTED_DATE_POST = (
+    '<img src="media/a.jpg" class="_a6_o _3-96" />'
+    '<div class="_3-94 _a6-o" dir="auto">Aug 06, 2012 4:13 pm</div>'
+)
+
+DATA_ATTRIBUTE_POST = (
+    '<img data-src="media/x.jpg" src="media/real.jpg" data-class="_a6_o _3-96" class="_a6_o _3-96" />'
+    '<div class="_3-94 _a6-o">Aug 06, 2012 4:13 pm</div>'
+)
+
+VIDEO_POST = (
+    '<div class="_3-95 _a6-p"><div><div><a target="_blank" href="media/posts/c.mp4">'
+    '<video src="media/posts/c.mp4" class="_a6_o _3-96" controls="1"></video></a></div></div></div>'
+    '<div class="_3-94 _a6-o">Mar 15, 2020 2:22 pm</div>'
+)
+
+CASES = {
+    'display-date': (
+        [DISPLAY_DATE_POST],
+        [('media/posts/a.jpg', datetime(2012, 8, 6, 16, 13))],
+    ),
+    'table-date': (
+        [TABLE_DATE_POST],
+        [('media/posts/b.jpg', datetime(2024, 9, 24, 15, 42, 54))],
+    ),
+    'escaped-src': (
+        [ESCAPED_SRC_POST],
+        [("media/posts/tom&jerry's.jpg", datetime(2015, 1, 2, 1, 0))],
+    ),
+    'drifted-date-markup': (
+        [DRIFTED_DATE_POST],
+        [('media/a.jpg', datetime(2012, 8, 6, 16, 13))],
+    ),
+    'data-attributes': (
+        [DATA_ATTRIBUTE_POST],
+        [('media/real.jpg', datetime(2012, 8, 6, 16, 13))],
+    ),
+    'video-post': (
+        [VIDEO_POST],
+        [('', datetime(2020, 3, 15, 14, 22))],
+    ),
+    'mixed': (
+        [DISPLAY_DATE_POST, DRIFTED_DATE_POST, TABLE_DATE_POST],
+        [
+            ('media/posts/a.jpg', datetime(2012, 8, 6, 16, 13)),
+            ('media/a.jpg', datetime(2012, 8, 6, 16, 13)),
+            ('media/posts/b.jpg', datetime(2024, 9, 24, 15, 42, 54)),
+        ],
+    ),
+}
+
+@pytest.mark.parametrize('posts, expected', CASES.values(), ids=list(CASES))
+def test_fast_path_matches_lxml_parser(posts, expected):
+    html_content = make_document(*posts)
+
+    scanned = list(fixer._scan_posts(html_content))
+    parsed = list(fixer._parse_posts(BytesIO(html_content)))
+
+    assert scanned == parsed
+    assert scanned == expected
+
+def test_video_posts_skip_lxml_reparse(monkeypatch):
+    def fail(source):
+        raise AssertionError("video post was re-parsed with lxml")
+    monkeypatch.setattr(fixer, '_parse_posts', fail)
+
+    assert list(fixer._scan_posts(make_document(VIDEO_POST))) == CASES['video-post'][1]
+
+@pytest.mark.parametrize('posts, expected', CASES.values(), ids=list(CASES))
+def test_read_posts_from_file(tmp_path, posts, expected):
+    html_file = tmp_path / 'posts_1.html'
+    html_file.write_bytes(make_document(*posts))
+
+    assert fixer._read_posts(html_file) == expected